@@ -1,7 +1,8 @@
 from brush import *
-import perlin_noise
+from snapshot import *
 import pygame
 import pygame.gfxdraw
+import threading
 from enum import Enum
 
 # Debug controls:
@@ -47,6 +48,7 @@ CornerCombinations = [[-1, -1, -1, -1],  # 0
                       ]
 
 
+# MarchingCubes here is the 2D version (marching squares), the 3D one lives in marching_cubes.py.
 class EMeshingAlgorithm(Enum):
     MarchingCubes = 0
     Squares = 1
@@ -93,6 +95,8 @@ class VoxelWorld:
         self.LineList: list[list]
         self.RenderSurface = None
         self.RenderSurface: pygame.surface.Surface
+        self.GenerationThread = None
+        self.GenerationThread: threading.Thread
 
     def convert_to_grid_pos(self, x: float, y: float) -> (int, int):
         return math.floor(x / self.BlockSize), math.floor(y / self.BlockSize)
@@ -125,7 +129,10 @@ class VoxelWorld:
             voxel.Value = 0.0
 
     def fill_list(self):
-        self.VoxelGrid.VoxelList = []
+        # Imported here so that starting from a snapshot never has to pay for it.
+        import perlin_noise
+
+        voxel_list = []
         noise = perlin_noise.PerlinNoise(octaves=self.Octaves, seed=self.Seed)
         for x in range(0, self.VoxelGrid.SizeX):
             row = []
@@ -134,7 +141,9 @@ class VoxelWorld:
                 solid = True if value < 0 else False
                 voxel = Voxel(solid, value if self.OriginalMCMethod else (0.8 if solid else 0.0), x, y)
                 row.append(voxel)
-            self.VoxelGrid.VoxelList.append(row)
+            voxel_list.append(row)
+        # Swapped in at the end so a frame drawn during background generation never sees a half filled grid.
+        self.VoxelGrid.VoxelList = voxel_list
 
     # Calculates the value of the current block that'll be used in the interpolation.
     def calculate_value(self, x: int, y: int) -> float:
@@ -384,6 +393,48 @@ class VoxelWorld:
         self.calculate_values()
         self.meshing_algorithm()
 
+    def remesh(self):
+        self.calculate_values()
+        self.meshing_algorithm()
+
+    def get_generation_key(self) -> tuple:
+        return (self.Seed, self.Octaves, self.Zoom, self.OriginalMCMethod)
+
+    def get_mesh_key(self) -> tuple:
+        return (self.AlgorithmToUse.value, self.BlockSize, self.Threshold, self.Interpolation, self.DebugDrawPointSize)
+
+    def is_generating(self) -> bool:
+        return self.GenerationThread is not None and self.GenerationThread.is_alive()
+
+    def start_generation_thread(self, target):
+        self.GenerationThread = threading.Thread(target=target, daemon=True)
+        self.GenerationThread.start()
+
+    # Continues from the last session's field and generation parameters if there's a snapshot of them, otherwise
+    # generates a new field. Anything that still needs work runs on a background thread so the window can start
+    # drawing right away.
+    def warm_start(self):
+        # load_snapshot already rejects generation keys that can't be generated from, like a Zoom of 0.
+        snapshot = load_snapshot(self.VoxelGrid.SizeX, self.VoxelGrid.SizeY)
+        if snapshot is None:
+            self.start_generation_thread(self.reset)
+            return
+
+        self.Seed, self.Octaves, self.Zoom, self.OriginalMCMethod = snapshot[0]
+        self.VoxelGrid.VoxelList = snapshot[1]
+        if snapshot[2] == self.get_mesh_key():
+            self.LineList = snapshot[3]
+        else:
+            self.start_generation_thread(self.remesh)
+
+    def save_session_snapshot(self):
+        if self.is_generating() or len(self.VoxelGrid.VoxelList) == 0:
+            return
+        try:
+            save_snapshot(self.VoxelGrid, self.get_generation_key(), self.LineList, self.get_mesh_key())
+        except OSError as error:
+            print("Failed to save snapshot: " + str(error))
+
     def handle_scroll_up(self):
         if self.CurrentIndexToChange == 0:
             self.Zoom += 1
@@ -446,7 +497,6 @@ class VoxelWorld:
 
 
     def run(self):
-        self.reset()
         pygame.init()
         window = pygame.display
         window.set_caption("Voxels Test")
@@ -456,12 +506,20 @@ class VoxelWorld:
         self.RenderSurface = renderer
         debug_font = pygame.font.SysFont("arial", 32)
         small_debug_font = pygame.font.SysFont("arial", int(self.BlockSize / 2))
+        self.warm_start()
+        clock = pygame.time.Clock()
         running = True
 
         while running:
+            generating = self.is_generating()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
+                # Everything else touches the grid, so it has to wait until the background generation is done.
+                if generating:
+                    if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                        running = False
+                    continue
                 if event.type == pygame.KEYDOWN:
                     shift_pressed = pygame.key.get_pressed()[pygame.K_LSHIFT]
                     if event.key == pygame.K_ESCAPE:
@@ -549,8 +607,9 @@ class VoxelWorld:
                     self.meshing_algorithm()
 
             renderer.fill((127, 127, 127, 127))
-            self.draw_outlines(renderer)
-            self.draw_voxels(renderer, small_debug_font)
+            if not generating:
+                self.draw_outlines(renderer)
+                self.draw_voxels(renderer, small_debug_font)
             self.draw_brush(renderer)
 
             brush_info = self.get_brush_information()
@@ -565,11 +624,16 @@ class VoxelWorld:
                     self.ScrollingIndexes[4]: brush_info[2],
                     self.ScrollingIndexes[5]: brush_info[3],
                     "CurrentlyModifying": self.ScrollingIndexes[self.CurrentIndexToChange],
-                    "CurrentBrush": brush_info[4]
+                    "CurrentBrush": brush_info[4],
+                    "Status": "Generating..." if generating else "Ready"
                 })
             window.flip()
+            # The generation is pure Python too, so an uncapped loop would only slow it down by holding the GIL.
+            if generating:
+                clock.tick(20)
 
         pygame.quit()
+        self.save_session_snapshot()
 
 
 if __name__ == '__main__':
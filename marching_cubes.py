@@ -0,0 +1,282 @@
+import argparse
+from array import array
+from voxel import *
+from utils import *
+
+#   The order of corners of a cube, the bottom face uses the same order as march_squares
+#       7 ---- 6
+#      /|     /|
+#     4 ---- 5 |
+#     | 3 ---|-2
+#     |/     |/
+#     0 ---- 1
+CornerOffsets = [(0, 0, 0),  # 0
+                 (1, 0, 0),  # 1
+                 (1, 1, 0),  # 2
+                 (0, 1, 0),  # 3
+                 (0, 0, 1),  # 4
+                 (1, 0, 1),  # 5
+                 (1, 1, 1),  # 6
+                 (0, 1, 1),  # 7
+                 ]
+EdgePairs3D = [[0, 1],  # 0
+               [1, 2],  # 1
+               [2, 3],  # 2
+               [3, 0],  # 3
+               [4, 5],  # 4
+               [5, 6],  # 5
+               [6, 7],  # 6
+               [7, 4],  # 7
+               [0, 4],  # 8
+               [1, 5],  # 9
+               [2, 6],  # 10
+               [3, 7],  # 11
+               ]
+Faces = [[0, 3, 2, 1],  # bottom
+         [4, 5, 6, 7],  # top
+         [0, 1, 5, 4],  # front
+         [2, 3, 7, 6],  # back
+         [0, 4, 7, 3],  # left
+         [1, 2, 6, 5],  # right
+         ]
+# Which cached vertex an edge maps to: (slice, axis, x offset, y offset)
+# slice 0 is the bottom slice, 1 the top one, axis 0 = along X, 1 = along Y, 2 = along Z (between the slices).
+EdgeCacheLookup = [(0, 0, 0, 0),  # 0
+                   (0, 1, 1, 0),  # 1
+                   (0, 0, 0, 1),  # 2
+                   (0, 1, 0, 0),  # 3
+                   (1, 0, 0, 0),  # 4
+                   (1, 1, 1, 0),  # 5
+                   (1, 0, 0, 1),  # 6
+                   (1, 1, 0, 0),  # 7
+                   (0, 2, 0, 0),  # 8
+                   (0, 2, 1, 0),  # 9
+                   (0, 2, 1, 1),  # 10
+                   (0, 2, 0, 1),  # 11
+                   ]
+
+
+def get_edge_index(first_corner: int, second_corner: int) -> int:
+    for i in range(len(EdgePairs3D)):
+        if sorted(EdgePairs3D[i]) == sorted([first_corner, second_corner]):
+            return i
+    return -1
+
+
+# Index used in TriangleTable for the center of a loop, CenterTable holds the edges that get averaged for it.
+# Center k of a configuration is CenterIndex + k.
+CenterIndex = 12
+
+
+# Builds the same kind of table as CornerCombinations, but for cubes: for every one of the 256 configurations a flat
+# list of edge indices, 3 per triangle. Instead of typing out the table, every face of the cube is marched like a
+# square and the resulting segments are chained into closed loops. Ambiguous faces always keep the inside corners
+# apart, so neighbouring cubes agree on the shared face and the surface has no holes.
+# Loops are fanned into triangles, except when a loop goes through both segments of an ambiguous face. Fanning that
+# one would put a triangle flat in the face, overlapping the one the neighbouring cube makes there, so instead it's
+# fanned around an extra vertex in the center of the loop.
+# Triangles are wound counter-clockwise when looking at them from the outside (the side below the threshold).
+def build_triangle_table() -> (list[list[int]], list[list[list[int]]]):
+    oriented_faces = []
+    for face in Faces:
+        # Make sure the corners of every face go counter-clockwise when looking at the cube from the inside.
+        p = [CornerOffsets[corner] for corner in face]
+        first = [p[1][i] - p[0][i] for i in range(3)]
+        second = [p[2][i] - p[0][i] for i in range(3)]
+        normal = [first[1] * second[2] - first[2] * second[1],
+                  first[2] * second[0] - first[0] * second[2],
+                  first[0] * second[1] - first[1] * second[0]]
+        to_center = [0.5 - p[0][i] for i in range(3)]
+        facing_inside = sum(normal[i] * to_center[i] for i in range(3)) > 0
+        oriented_faces.append(face if facing_inside else list(reversed(face)))
+
+    triangle_table = []
+    center_table = []
+    for configuration in range(256):
+        next_edge = {}
+        segment_face = {}
+        for face_index, face in enumerate(oriented_faces):
+            inside = [bool(configuration & (1 << corner)) for corner in face]
+            if all(inside) or not any(inside):
+                continue
+            # Walking around the face, every run of inside corners is closed off by one segment going from the edge
+            # where the run ends to the edge where it started.
+            for i in range(4):
+                if not inside[i] or inside[i - 1]:
+                    continue
+                start_edge = get_edge_index(face[i - 1], face[i])
+                end = i
+                while inside[(end + 1) % 4]:
+                    end += 1
+                end_edge = get_edge_index(face[end % 4], face[(end + 1) % 4])
+                next_edge[end_edge] = start_edge
+                segment_face[end_edge] = face_index
+
+        triangles = []
+        centers = []
+        while next_edge:
+            first_edge = next(iter(next_edge))
+            loop = [first_edge]
+            edge = next_edge.pop(first_edge)
+            while edge != first_edge:
+                loop.append(edge)
+                edge = next_edge.pop(edge)
+
+            loop_faces = [segment_face[edge] for edge in loop]
+            if len(set(loop_faces)) == len(loop_faces):
+                for i in range(1, len(loop) - 1):
+                    triangles += [loop[0], loop[i], loop[i + 1]]
+            else:
+                center = CenterIndex + len(centers)
+                centers.append(loop)
+                for i in range(len(loop)):
+                    triangles += [center, loop[i], loop[(i + 1) % len(loop)]]
+        triangle_table.append(triangles)
+        center_table.append(centers)
+    return triangle_table, center_table
+
+
+TriangleTable, CenterTable = build_triangle_table()
+
+
+# Keeps the whole mesh in memory as a vertex buffer with 3 floats per vertex and an index buffer with 3 per triangle.
+class IndexedMesh:
+    def __init__(self):
+        self.Vertices = array("f")
+        self.Indices = array("I")
+        self.VertexCount = 0
+        self.TriangleCount = 0
+
+    def add_vertex(self, x: float, y: float, z: float) -> int:
+        self.Vertices.extend((x, y, z))
+        self.VertexCount += 1
+        return self.VertexCount - 1
+
+    def add_triangle(self, first: int, second: int, third: int):
+        self.Indices.extend((first, second, third))
+        self.TriangleCount += 1
+
+
+# Same interface as IndexedMesh but writes everything straight into a Wavefront .obj file, so the mesh itself never
+# has to fit in memory either.
+class ObjMeshWriter:
+    def __init__(self, path: str):
+        self.File = open(path, "w")
+        self.VertexCount = 0
+        self.TriangleCount = 0
+
+    def add_vertex(self, x: float, y: float, z: float) -> int:
+        self.File.write("v {:.4f} {:.4f} {:.4f}\n".format(x, y, z))
+        self.VertexCount += 1
+        return self.VertexCount - 1
+
+    def add_triangle(self, first: int, second: int, third: int):
+        # .obj indices start at 1
+        self.File.write("f {} {} {}\n".format(first + 1, second + 1, third + 1))
+        self.TriangleCount += 1
+
+    def close(self):
+        self.File.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# Marches the field two Z slices at a time, only the two slices and the vertex indices on their edges are ever kept
+# around, so peak memory is O(SizeX * SizeY) no matter how big SizeZ is.
+# Vertices on edges shared by neighbouring cubes are only emitted once.
+def march_cubes(field: VoxelFieldInfo3D, mesh, threshold: float = 0.0, scale: float = 1.0):
+    size_x = field.SizeX
+    size_y = field.SizeY
+    plane_size = size_x * size_y
+
+    bottom = field.get_slice(0)
+    # Vertex index cache per edge axis, [slice][axis][x * size_y + y], -1 means not emitted yet.
+    bottom_cache = [[-1] * plane_size, [-1] * plane_size, [-1] * plane_size]
+
+    for z in range(field.SizeZ - 1):
+        top = field.get_slice(z + 1)
+        top_cache = [[-1] * plane_size, [-1] * plane_size, [-1] * plane_size]
+        caches = [bottom_cache, top_cache]
+
+        for x in range(size_x - 1):
+            for y in range(size_y - 1):
+                index = x * size_y + y
+                values = [bottom[index], bottom[index + size_y], bottom[index + size_y + 1], bottom[index + 1],
+                          top[index], top[index + size_y], top[index + size_y + 1], top[index + 1]]
+
+                configuration = 0
+                power = 1
+                for value in values:
+                    configuration += int(value > threshold) * power
+                    power *= 2
+                if configuration == 0 or configuration == 255:
+                    continue
+
+                edge_vertices = {}
+                for edge in TriangleTable[configuration]:
+                    if edge in edge_vertices or edge >= CenterIndex:
+                        continue
+                    lookup = EdgeCacheLookup[edge]
+                    cache = caches[lookup[0]][lookup[1]]
+                    cache_index = (x + lookup[2]) * size_y + y + lookup[3]
+                    if cache[cache_index] == -1:
+                        first_corner, second_corner = EdgePairs3D[edge]
+                        cache[cache_index] = mesh.add_vertex(*get_edge_point(x, y, z, first_corner, second_corner,
+                                                                             values[first_corner], values[second_corner],
+                                                                             threshold, scale))
+                    edge_vertices[edge] = cache[cache_index]
+
+                # Centers are inside the cube, so unlike the edge vertices they're never shared with a neighbour.
+                for i, loop in enumerate(CenterTable[configuration]):
+                    center = [0.0, 0.0, 0.0]
+                    for edge in loop:
+                        first_corner, second_corner = EdgePairs3D[edge]
+                        point = get_edge_point(x, y, z, first_corner, second_corner,
+                                               values[first_corner], values[second_corner], threshold, scale)
+                        for axis in range(3):
+                            center[axis] += point[axis] / len(loop)
+                    edge_vertices[CenterIndex + i] = mesh.add_vertex(*center)
+
+                triangles = TriangleTable[configuration]
+                for i in range(0, len(triangles), 3):
+                    mesh.add_triangle(edge_vertices[triangles[i]],
+                                      edge_vertices[triangles[i + 1]],
+                                      edge_vertices[triangles[i + 2]])
+
+        bottom = top
+        bottom_cache = top_cache
+
+
+def get_edge_point(x: int, y: int, z: int, first_corner: int, second_corner: int, first_value: float,
+                   second_value: float, threshold: float, scale: float) -> (float, float, float):
+    first_offset = CornerOffsets[first_corner]
+    second_offset = CornerOffsets[second_corner]
+    interpolation = 0.5
+    if abs(second_value - first_value) > 0:
+        interpolation = clamp((threshold - first_value) / (second_value - first_value), 0.0, 1.0)
+    return ((x + first_offset[0] + (second_offset[0] - first_offset[0]) * interpolation) * scale,
+            (y + first_offset[1] + (second_offset[1] - first_offset[1]) * interpolation) * scale,
+            (z + first_offset[2] + (second_offset[2] - first_offset[2]) * interpolation) * scale)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Streams a 3D noise field through marching cubes into an .obj file.")
+    parser.add_argument("output", help="Path of the .obj file to write.")
+    parser.add_argument("--size", type=int, nargs=3, default=[32, 32, 32], metavar=("X", "Y", "Z"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--octaves", type=int, default=2)
+    parser.add_argument("--zoom", type=float, default=20.0)
+    parser.add_argument("--threshold", type=float, default=0.0)
+    parser.add_argument("--scale", type=float, default=1.0)
+    arguments = parser.parse_args()
+
+    voxel_field = VoxelFieldInfo3D(arguments.size[0], arguments.size[1], arguments.size[2],
+                                   arguments.seed, arguments.octaves, arguments.zoom)
+    with ObjMeshWriter(arguments.output) as writer:
+        march_cubes(voxel_field, writer, arguments.threshold, arguments.scale)
+        print("Wrote {} vertices and {} triangles to {}".format(writer.VertexCount, writer.TriangleCount,
+                                                                 arguments.output))
@@ -0,0 +1,107 @@
+import json
+import os
+import sys
+from array import array
+from voxel import *
+
+SnapshotDirectory = "snapshots"
+SnapshotPath = os.path.join(SnapshotDirectory, "last.snapshot")
+SnapshotVersion = 3
+
+
+# The generation key is (Seed, Octaves, Zoom, OriginalMCMethod), Zoom divides the noise coordinates so it can't be 0.
+def is_valid_generation_key(generation_key) -> bool:
+    if not isinstance(generation_key, list) or len(generation_key) != 4:
+        return False
+    seed, octaves, zoom, original_mc_method = generation_key
+    return (type(seed) is int and type(octaves) is int and octaves > 0 and
+            type(zoom) in (int, float) and zoom > 0 and type(original_mc_method) is bool)
+
+
+# Only the last session is kept. The generation parameters the field was made with are stored next to it, so the
+# next launch can start from them instead of the defaults.
+# The mesh has its own key, if it doesn't match the current settings only a remesh is needed instead of regenerating.
+# The file is one line of JSON header followed by the raw values, solidity and line arrays.
+def save_snapshot(voxel_grid: VoxelGridInfo, generation_key: tuple, line_list: list, mesh_key: tuple):
+    values = array("d")
+    solidity = bytearray()
+    for x in range(voxel_grid.SizeX):
+        for y in range(voxel_grid.SizeY):
+            voxel = voxel_grid.VoxelList[x][y]
+            values.append(voxel.Value)
+            solidity.append(int(voxel.Solidity))
+
+    lines = array("d")
+    for line in line_list:
+        lines.extend((line[0][0], line[0][1], line[1][0], line[1][1]))
+
+    header = {
+        "Version": SnapshotVersion,
+        "ByteOrder": sys.byteorder,
+        "SizeX": voxel_grid.SizeX,
+        "SizeY": voxel_grid.SizeY,
+        "GenerationKey": list(generation_key),
+        "MeshKey": list(mesh_key),
+        "LineCount": len(line_list),
+    }
+
+    os.makedirs(SnapshotDirectory, exist_ok=True)
+    # Write to a temporary file first so a crash mid-write never leaves a broken snapshot behind.
+    temp_path = SnapshotPath + ".tmp"
+    with open(temp_path, "wb") as file:
+        file.write(json.dumps(header).encode("utf-8") + b"\n")
+        file.write(values.tobytes())
+        file.write(bytes(solidity))
+        file.write(lines.tobytes())
+    os.replace(temp_path, SnapshotPath)
+
+
+# Returns (generation_key, voxel_list, mesh_key, line_list) or None if there's no usable snapshot for this grid size.
+def load_snapshot(size_x: int, size_y: int):
+    if not os.path.isfile(SnapshotPath):
+        return None
+
+    try:
+        with open(SnapshotPath, "rb") as file:
+            header = json.loads(file.readline().decode("utf-8"))
+            data = file.read()
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(header, dict) or header.get("Version") != SnapshotVersion:
+        return None
+    if header.get("ByteOrder") != sys.byteorder or header.get("SizeX") != size_x or header.get("SizeY") != size_y:
+        return None
+    generation_key = header.get("GenerationKey")
+    mesh_key = header.get("MeshKey")
+    line_count = header.get("LineCount")
+    if not is_valid_generation_key(generation_key) or not isinstance(mesh_key, list):
+        return None
+    if type(line_count) is not int or line_count < 0:
+        return None
+
+    voxel_count = size_x * size_y
+    values = array("d")
+    lines = array("d")
+    values_end = voxel_count * values.itemsize
+    solidity_end = values_end + voxel_count
+    if len(data) != solidity_end + line_count * 4 * lines.itemsize:
+        return None
+    values.frombytes(data[:values_end])
+    solidity = data[values_end:solidity_end]
+    lines.frombytes(data[solidity_end:])
+
+    voxel_list = []
+    index = 0
+    for x in range(size_x):
+        row = []
+        for y in range(size_y):
+            row.append(Voxel(bool(solidity[index]), values[index], x, y))
+            index += 1
+        voxel_list.append(row)
+
+    line_list = []
+    for i in range(0, len(lines), 4):
+        line_list.append([[lines[i], lines[i + 1]], [lines[i + 2], lines[i + 3]]])
+
+    return tuple(generation_key), voxel_list, tuple(mesh_key), line_list
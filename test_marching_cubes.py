@@ -0,0 +1,120 @@
+import math
+import random
+import pytest
+from collections import Counter
+from marching_cubes import *
+
+# Can be run with pytest.
+
+
+# Stands in for VoxelFieldInfo3D so the checks don't need perlin_noise. Every slice is computed from z alone, so the
+# same slice always comes back the same no matter how often it's asked for.
+class FunctionField:
+    def __init__(self, size: int, function):
+        self.SizeX = size
+        self.SizeY = size
+        self.SizeZ = size
+        self.Function = function
+
+    def get_slice(self, z: int) -> array:
+        values = array("f")
+        for x in range(self.SizeX):
+            for y in range(self.SizeY):
+                values.append(self.Function(x, y, z))
+        return values
+
+
+def sphere_field() -> FunctionField:
+    return FunctionField(14, lambda x, y, z: 5.0 - math.dist((x, y, z), (7.3, 7.1, 6.9)))
+
+
+# Random values with a border of air, so the surface has lots of ambiguous faces but is still closed.
+def random_field(seed: int) -> FunctionField:
+    size = 20
+
+    def value(x: int, y: int, z: int) -> float:
+        if not (0 < x < size - 1 and 0 < y < size - 1 and 0 < z < size - 1):
+            return -1.0
+        return random.Random(seed * size * size * size + (x * size + y) * size + z).random() - 0.5
+
+    return FunctionField(size, value)
+
+
+def get_triangles(mesh: IndexedMesh) -> list:
+    return [mesh.Indices[i:i + 3] for i in range(0, len(mesh.Indices), 3)]
+
+
+def get_directed_edges(mesh: IndexedMesh) -> Counter:
+    directed_edges = Counter()
+    for first, second, third in get_triangles(mesh):
+        for edge in ((first, second), (second, third), (third, first)):
+            directed_edges[edge] += 1
+    return directed_edges
+
+
+# A closed, consistently wound mesh uses every directed edge exactly once, and the opposite direction exactly once.
+def assert_closed_and_consistent(mesh: IndexedMesh):
+    directed_edges = get_directed_edges(mesh)
+    assert len(directed_edges) > 0
+    for edge, count in directed_edges.items():
+        assert count == 1, "edge {} is used by {} triangles".format(edge, count)
+        assert directed_edges[(edge[1], edge[0])] == 1, "edge {} has no matching opposite edge".format(edge)
+
+
+# With triangles wound counter-clockwise from the outside the signed volume is positive.
+def get_signed_volume(mesh: IndexedMesh) -> float:
+    volume = 0.0
+    vertices = mesh.Vertices
+    for triangle in get_triangles(mesh):
+        a, b, c = [vertices[index * 3:index * 3 + 3] for index in triangle]
+        volume += (a[0] * (b[1] * c[2] - b[2] * c[1]) +
+                   a[1] * (b[2] * c[0] - b[0] * c[2]) +
+                   a[2] * (b[0] * c[1] - b[1] * c[0])) / 6.0
+    return volume
+
+
+def test_triangle_table_uses_every_crossed_edge():
+    for configuration in range(256):
+        crossed = set()
+        for i in range(len(EdgePairs3D)):
+            first_corner, second_corner = EdgePairs3D[i]
+            if bool(configuration & (1 << first_corner)) != bool(configuration & (1 << second_corner)):
+                crossed.add(i)
+        edges = {edge for edge in TriangleTable[configuration] if edge < CenterIndex}
+        assert edges == crossed, "configuration {}".format(configuration)
+
+
+def test_sphere_is_closed():
+    mesh = IndexedMesh()
+    march_cubes(sphere_field(), mesh)
+    assert_closed_and_consistent(mesh)
+    # Close to 4/3 * pi * r^3 for r = 5
+    assert abs(get_signed_volume(mesh) - 4.0 / 3.0 * math.pi * 125.0) < 25.0
+
+
+def test_random_field_is_closed():
+    for seed in range(3):
+        mesh = IndexedMesh()
+        march_cubes(random_field(seed), mesh)
+        assert_closed_and_consistent(mesh)
+        assert get_signed_volume(mesh) > 0.0
+
+
+def test_noise_field_slices():
+    pytest.importorskip("perlin_noise")
+    voxel_field = VoxelFieldInfo3D(6, 4, 3, seed=2, zoom=3.0)
+    first = voxel_field.get_slice(1)
+    assert len(first) == 6 * 4
+    assert list(voxel_field.get_slice(1)) == list(first)
+    # x * SizeY + y layout, with the coordinates scaled by Zoom
+    assert first[5 * 4 + 2] == pytest.approx(voxel_field.Noise.noise([5 / 3.0, 2 / 3.0, 1 / 3.0]))
+
+
+def test_noise_field_mesh_is_consistent():
+    pytest.importorskip("perlin_noise")
+    mesh = IndexedMesh()
+    march_cubes(VoxelFieldInfo3D(8, 8, 8, seed=1, zoom=3.0), mesh)
+    # The surface is cut open at the border of the field, so it's not closed, but no edge can be used twice.
+    directed_edges = get_directed_edges(mesh)
+    assert len(directed_edges) > 0
+    assert max(directed_edges.values()) == 1
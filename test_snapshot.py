@@ -0,0 +1,101 @@
+import json
+import os
+import snapshot
+from snapshot import *
+
+# Can be run with pytest.
+
+
+def use_temp_snapshot_path(monkeypatch, tmp_path):
+    directory = str(tmp_path / "snapshots")
+    monkeypatch.setattr(snapshot, "SnapshotDirectory", directory)
+    monkeypatch.setattr(snapshot, "SnapshotPath", os.path.join(directory, "last.snapshot"))
+
+
+def make_grid(size_x: int, size_y: int) -> VoxelGridInfo:
+    voxel_grid = VoxelGridInfo(size_x, size_y)
+    for x in range(size_x):
+        voxel_grid.VoxelList.append([Voxel((x + y) % 3 == 0, x * 0.25 - y * 0.125, x, y) for y in range(size_y)])
+    return voxel_grid
+
+
+GenerationKey = (3, 2, 21, False)
+MeshKey = (0, 25, 0.01, True, 5.0)
+Lines = [[[1.0, 2.5], [3.0, 4.0]], [[0.0, -1.5], [7.25, 8.0]]]
+
+
+def save_default_snapshot():
+    save_snapshot(make_grid(4, 5), GenerationKey, Lines, MeshKey)
+
+
+def rewrite_header(**changes):
+    with open(snapshot.SnapshotPath, "rb") as file:
+        header = json.loads(file.readline().decode("utf-8"))
+        data = file.read()
+    header.update(changes)
+    with open(snapshot.SnapshotPath, "wb") as file:
+        file.write(json.dumps(header).encode("utf-8") + b"\n")
+        file.write(data)
+
+
+def test_round_trip(monkeypatch, tmp_path):
+    use_temp_snapshot_path(monkeypatch, tmp_path)
+    save_default_snapshot()
+
+    generation_key, voxel_list, mesh_key, line_list = load_snapshot(4, 5)
+    expected = make_grid(4, 5)
+    for x in range(4):
+        for y in range(5):
+            assert voxel_list[x][y].Value == expected.VoxelList[x][y].Value
+            assert voxel_list[x][y].Solidity == expected.VoxelList[x][y].Solidity
+            assert (voxel_list[x][y].X, voxel_list[x][y].Y) == (x, y)
+    assert generation_key == GenerationKey
+    assert mesh_key == MeshKey
+    assert line_list == Lines
+
+
+def test_missing_file(monkeypatch, tmp_path):
+    use_temp_snapshot_path(monkeypatch, tmp_path)
+    assert load_snapshot(4, 5) is None
+
+
+def test_wrong_size(monkeypatch, tmp_path):
+    use_temp_snapshot_path(monkeypatch, tmp_path)
+    save_default_snapshot()
+    assert load_snapshot(5, 4) is None
+
+
+def test_wrong_version(monkeypatch, tmp_path):
+    use_temp_snapshot_path(monkeypatch, tmp_path)
+    save_default_snapshot()
+    rewrite_header(Version=SnapshotVersion + 1)
+    assert load_snapshot(4, 5) is None
+
+
+def test_wrong_lengths(monkeypatch, tmp_path):
+    use_temp_snapshot_path(monkeypatch, tmp_path)
+    save_default_snapshot()
+    rewrite_header(LineCount=len(Lines) + 1)
+    assert load_snapshot(4, 5) is None
+
+    save_default_snapshot()
+    with open(snapshot.SnapshotPath, "ab") as file:
+        file.write(b"\x00")
+    assert load_snapshot(4, 5) is None
+
+
+def test_garbage_bytes(monkeypatch, tmp_path):
+    use_temp_snapshot_path(monkeypatch, tmp_path)
+    os.makedirs(snapshot.SnapshotDirectory)
+    for garbage in [b"garbage", b"\xff\xfe\n", b"cos\ngetcwd\n)R.", b"[1, 2]\n", b""]:
+        with open(snapshot.SnapshotPath, "wb") as file:
+            file.write(garbage)
+        assert load_snapshot(4, 5) is None
+
+
+def test_bad_generation_key(monkeypatch, tmp_path):
+    use_temp_snapshot_path(monkeypatch, tmp_path)
+    for generation_key in [[3, 2, 0, False], [3, 2, -5, False], [3, 2, "21", False], [3, 2, 21], None]:
+        save_default_snapshot()
+        rewrite_header(GenerationKey=generation_key)
+        assert load_snapshot(4, 5) is None
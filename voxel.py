@@ -1,3 +1,6 @@
+from array import array
+
+
 class Voxel:
     def __init__(self, solidity: bool, value: float, x: int, y: int):
         self.Solidity = solidity
@@ -19,3 +22,30 @@ class VoxelGridInfo:
         if self.is_location_inside(x, y) is False:
             return Voxel(False, 0.0, x, y)
         return self.VoxelList[x][y]
+
+
+# A 3D noise field that is never stored as a whole, only one Z slice is produced at a time.
+# Slices are flat arrays indexed by x * SizeY + y, the same order as VoxelGridInfo.VoxelList[x][y].
+class VoxelFieldInfo3D:
+    def __init__(self, size_x: int, size_y: int, size_z: int, seed: int = 0, octaves: int = 2, zoom: float = 20.0):
+        self.SizeX = size_x
+        self.SizeY = size_y
+        self.SizeZ = size_z
+        self.Seed = seed
+        self.Octaves = octaves
+        self.Zoom = zoom
+        self.Noise = None
+
+    def get_slice(self, z: int) -> array:
+        if self.Noise is None:
+            # Imported on the first slice, so creating a field and importing this module stay cheap.
+            import perlin_noise
+            self.Noise = perlin_noise.PerlinNoise(octaves=self.Octaves, seed=self.Seed)
+
+        values = array("f")
+        noise_z = float(z) / self.Zoom
+        for x in range(self.SizeX):
+            noise_x = float(x) / self.Zoom
+            for y in range(self.SizeY):
+                values.append(self.Noise.noise([noise_x, float(y) / self.Zoom, noise_z]))
+        return values